@@ -15,56 +15,70 @@ See also:
 """
 
 import numpy as np
-import math
 from sklearn.base import BaseEstimator, RegressorMixin, _fit_context
 from sklearn.utils.validation import check_is_fitted
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
-def tricubic(x):
+
+def maybe_jit(func):
     """
-    Tri-cubic weighting function.
+    Compile a function with numba's @njit when numba is installed.
+
+    numba is an optional dependency: when it is not available the function
+    is returned unchanged and runs as plain Python/NumPy.
 
     Parameters
     ----------
-    x : np.array
-        Input array for which the weights will be computed
+    func : callable
+        Function to be compiled.
 
     Returns
     -------
-    np.array
-        Values of the weights.
-
+    callable
+        The compiled function, or `func` itself if numba is missing.
     """
-    y = np.zeros_like(x)
+    if njit is None:
+        return func
+    return njit(cache=True, fastmath=True)(func)
 
-    idx = (x >= -1) & (x <= 1)
 
-    y[idx] = np.power(1.0 - np.power(np.abs(x[idx]), 3), 3)
+# Assumed per-core L1 data cache size, used to pick the query block size in
+# predict. The batched evaluation is memory-bound: each query touches
+# n_neighbors float64 values several times, so tiles are sized to keep the
+# (block, n_neighbors) temporaries cache-resident.
+L1_CACHE_BYTES = 32 * 1024
 
-    return y
+# Local normal equations whose condition number exceeds this are treated as
+# degenerate and solved by least squares instead of the direct batched solve
+MAX_NORMAL_EQUATIONS_COND = 1.0 / np.finfo(np.float64).eps
 
 
-def normalize_value(value, min_value, max_value):
+def tricubic(x):
     """
-    Normalize a value to the range [0, 1].
+    Tri-cubic weighting function.
 
     Parameters
     ----------
-    value : float
-        The value to be normalized.
-    min_value : float
-        The minimum value in the range.
-    max_value : float
-        The maximum value in the range.
+    x : np.array
+        Input array for which the weights will be computed
 
     Returns
     -------
-    float
-        The normalized value.
+    np.array
+        Values of the weights.
+
     """
-    # Calculate the normalized value by subtracting the minimum value
-    # and dividing by the range between the minimum and maximum values
-    return (value - min_value) / (max_value - min_value)
+    # Clipping |x| to [0, 1] sends out-of-support points to weight zero
+    # without building a boolean mask or branching
+    x = np.clip(np.abs(x), 0.0, 1.0)
+    # Explicit multiplies instead of np.power(..., 3): integer cubes compile
+    # to three SIMD multiplications rather than a pow call per element
+    cube = 1.0 - x * x * x
+    return cube * cube * cube
 
 
 def normalize_array(array):
@@ -88,154 +102,128 @@ def normalize_array(array):
     # Compute the maximum value of the array
     max_val = np.max(array)
 
-    # Normalize the array by subtracting the minimum value and dividing by the range
-    # norm_array = (array - min_val) / (max_val - min_val)
-    norm_array = np.vectorize(normalize_value)(array, min_val, max_val)
+    # Normalize the array by subtracting the minimum value and dividing by the range;
+    # a single broadcast ufunc is much faster than a np.vectorize Python loop
+    norm_array = (array - min_val) / (max_val - min_val)
     # Return the normalized array, minimum value, and maximum value
     return norm_array, min_val, max_val
 
 
-def get_min_range(distances, n):
+@maybe_jit
+def slide_windows(norm_X_global, norm_X_query, n):
     """
-    Find the indices of the `n` closest points to the minimum distance.
+    Compute the left edge of the `n`-point neighborhood of each query point.
+
+    Both arrays must be sorted in ascending order; the window then only ever
+    advances to the right, so the whole sweep is O(n_queries + n_samples)
+    instead of one O(n_samples) distance scan per query.
 
     Parameters
     ----------
-    distances : np.array
-        Array of distances.
+    norm_X_global : np.array
+        Sorted normalized X values of the training data.
+    norm_X_query : np.array
+        Sorted normalized query points.
     n : int
-        Number of closest points to return.
+        Number of closest points in each neighborhood.
 
     Returns
     -------
     np.array
-        Indices of the closest points.
+        Left edge of the neighborhood window of each query point.
     """
-    # Find the minimum distance
-    min_idx = np.argmin(distances)
-    # Get the length of the array
-    n_items = len(distances)
-
-    # Check if the minimum distance is on the boundary
-    if min_idx == 0:
-        # If the minimum distance is at the beginning of the array,
-        # return the first `n` elements
-        return np.arange(0, n, dtype=np.int64)
-    if min_idx == n_items - 1:
-        # If the minimum distance is at the end of the array, return the last `n` elements
-        return np.arange(n_items - n, n_items, dtype=np.int64)
-
-    # Initialize the array of indices
-    min_range = [min_idx]
-    # Iterate until the size of the array is `n`
-    while len(min_range) < n:
-        # Get the first and last elements of the array
-        i0 = min_range[0]
-        i1 = min_range[-1]
-
-        # Check if the first element is at the beginning of the array
-        if i0 == 0:
-            # If it is, add the next element to the array
-            min_range.append(i1 + 1)
-        # Check if the last element is at the end of the array
-        elif i1 == n_items - 1:
-            # If it is, add the previous element to the beginning of the array
-            min_range.insert(0, i0 - 1)
-        # Check if the distance to the left is smaller than the distance to the right
-        elif distances[i0 - 1] < distances[i1 + 1]:
-            # If it is, add the previous element to the beginning of the array
-            min_range.insert(0, i0 - 1)
-        # Otherwise, add the next element to the array
-        else:
-            min_range.append(i1 + 1)
-    # Return the array of indices
-
-    return np.array(min_range, dtype=np.int64)
-
-
-def get_weights(distances, min_range):
+    n_items = norm_X_global.shape[0]
+    left_edges = np.empty(norm_X_query.shape[0], dtype=np.int64)
+    left = 0
+    for i in range(norm_X_query.shape[0]):
+        x = norm_X_query[i]
+        # Advance the window while the next point on the right is closer
+        # than the leftmost point currently inside it
+        while (
+            left + n < n_items
+            and norm_X_global[left + n] - x < x - norm_X_global[left]
+        ):
+            left += 1
+        left_edges[i] = left
+    return left_edges
+
+
+def estimate_polynomial_batch(xx, yy, weights, norm_X_query, exponents):
     """
-    Calculate weights for each point in the given range.
+    Vectorized local-polynomial estimate for a batch of query points.
 
     Parameters
     ----------
-    distances : np.array
-        Array of distances.
-    min_range : np.array
-        Array of indices of the points within the minimal-distance window.
+    xx : np.array, shape (n_queries, n_neighbors)
+        Normalized X values of the neighborhood of each query point.
+    yy : np.array, shape (n_queries, n_neighbors)
+        Normalized y values of the neighborhood of each query point.
+    weights : np.array, shape (n_queries, n_neighbors)
+        Tricubic weights of each neighborhood.
+    norm_X_query : np.array, shape (n_queries,)
+        Normalized query points.
+    exponents : np.array, shape (degree + 1,)
+        Monomial exponents of the local polynomial.
 
     Returns
     -------
-    np.array
-        Array of weights.
+    np.array, shape (n_queries,)
+        Estimated values in normalized space.
     """
-    # Find the maximum distance within the range
-    local_distances = distances[min_range]
-    max_local_distance = np.max(local_distances)
-
-    # Normalize the distances within the range
-    normalized_local_distances = local_distances / max_local_distance
-
-    # Apply tricubic function to normalized distances
-    weights = tricubic(normalized_local_distances)
-
-    return weights
-
-
-def denormalize(value, min_value, max_value):
+    # Stacked Vandermonde and (degree + 1) square normal equations of every
+    # query, solved in one batched LAPACK call
+    xm = xx[:, :, None] ** exponents
+    weighted_xm = xm * weights[:, :, None]
+    lhs = np.einsum("nkd,nke->nde", weighted_xm, xm)
+    rhs = np.einsum("nkd,nk->nd", weighted_xm, yy)
+
+    # Singular and near-singular systems (tiny or degenerate neighborhoods)
+    # would pass through np.linalg.solve with meaningless coefficients, so
+    # detect them by condition number and solve them by least squares on the
+    # sqrt-weighted Vandermonde, which handles rank deficiency
+    cond = np.linalg.cond(lhs)
+    solvable = np.isfinite(cond) & (cond < MAX_NORMAL_EQUATIONS_COND)
+    beta = np.empty_like(rhs)
+    if solvable.any():
+        beta[solvable] = np.linalg.solve(lhs[solvable], rhs[solvable])
+    degenerate = np.flatnonzero(~solvable)
+    if degenerate.size:
+        sqrt_weights = np.sqrt(weights[degenerate])
+        for j, i in enumerate(degenerate):
+            beta[i] = np.linalg.lstsq(
+                xm[i] * sqrt_weights[j][:, None],
+                yy[i] * sqrt_weights[j],
+                rcond=None,
+            )[0]
+    xp = norm_X_query[:, None] ** exponents
+    return np.einsum("nd,nd->n", beta, xp)
+
+
+def estimate_linear_batch(xx, yy, weights, norm_X_query):
     """
-    Denormalize a value from the range [0, 1] to the original range.
+    Vectorized local-linear estimate for a batch of query points.
 
     Parameters
     ----------
-    value : float
-        The normalized value to be denormalized.
-    min_value : float
-        The minimum value in the original range.
-    max_value : float
-        The maximum value in the original range.
+    xx : np.array, shape (n_queries, n_neighbors)
+        Normalized X values of the neighborhood of each query point.
+    yy : np.array, shape (n_queries, n_neighbors)
+        Normalized y values of the neighborhood of each query point.
+    weights : np.array, shape (n_queries, n_neighbors)
+        Tricubic weights of each neighborhood.
+    norm_X_query : np.array, shape (n_queries,)
+        Normalized query points.
 
     Returns
     -------
-    float
-        The denormalized value.
+    np.array, shape (n_queries,)
+        Estimated values in normalized space.
     """
-    # Multiply the normalized value by the range and add the minimum value
-    # to get the denormalized value
-    return value * (max_value - min_value) + min_value
-
-
-def estimate_polynomial(
-    n_neighbors,
-    weights,
-    degree,
-    norm_X_global,
-    norm_y_global,
-    norm_X_local,
-    min_range,
-):
-    wm = np.multiply(np.eye(n_neighbors), weights)
-    xm = np.ones((n_neighbors, degree + 1))
-
-    xp = np.array([[math.pow(norm_X_local, p)] for p in range(degree + 1)])
-    for i in range(1, degree + 1):
-        xm[:, i] = np.power(norm_X_global[min_range], i)
-
-    ym = norm_y_global[min_range]
-    xmt_wm = np.transpose(xm) @ wm
-    beta = np.linalg.pinv(xmt_wm @ xm) @ xmt_wm @ ym
-    y = (beta @ xp)[0]
-    return y
-
-
-def estimate_linear(min_range, norm_X_global, norm_y_global, weights, norm_X_local):
-    xx = norm_X_global[min_range]
-    yy = norm_y_global[min_range]
-    sum_weight = np.sum(weights)
-    sum_weight_x = np.dot(xx, weights)
-    sum_weight_y = np.dot(yy, weights)
-    sum_weight_x2 = np.dot(np.multiply(xx, xx), weights)
-    sum_weight_xy = np.dot(np.multiply(xx, yy), weights)
+    sum_weight = np.sum(weights, axis=1)
+    sum_weight_x = np.einsum("ij,ij->i", xx, weights)
+    sum_weight_y = np.einsum("ij,ij->i", yy, weights)
+    sum_weight_x2 = np.einsum("ij,ij,ij->i", xx, xx, weights)
+    sum_weight_xy = np.einsum("ij,ij,ij->i", xx, yy, weights)
 
     mean_x = sum_weight_x / sum_weight
     mean_y = sum_weight_y / sum_weight
@@ -244,7 +232,7 @@ def estimate_linear(min_range, norm_X_global, norm_y_global, weights, norm_X_loc
         sum_weight_x2 - mean_x * mean_x * sum_weight
     )
     a = mean_y - b * mean_x
-    y = a + b * norm_X_local
+    y = a + b * norm_X_query
     return y
 
 
@@ -318,6 +306,10 @@ class LOESS(RegressorMixin, BaseEstimator):
     smoothing : float, default=0.33
         The amount of smoothing to apply to the data.
         This determines how many of the closest points will be used in the estimation.
+    sort : bool, default=True
+        Whether to sort the training data by X during fit. The sliding-window
+        neighborhood search requires ascending X; pass False to skip the
+        sort when the input is already ordered.
     Attributes
     ----------
     is_fitted_ : bool
@@ -339,11 +331,13 @@ class LOESS(RegressorMixin, BaseEstimator):
     _parameter_constraints = {
         "degree": [int],
         "smoothing": [float, int],
+        "sort": [bool],
     }
 
-    def __init__(self, degree=1, smoothing=0.33):
+    def __init__(self, degree=1, smoothing=0.33, sort=True):
         self.degree = degree
         self.smoothing = smoothing
+        self.sort = sort
 
     @_fit_context(prefer_skip_nested_validation=True)
     def fit(self, X, y):
@@ -365,41 +359,136 @@ class LOESS(RegressorMixin, BaseEstimator):
         X = to_numpy_array(X)
         validate_smoothing(self.smoothing, self.degree, len(X))
         self.n_neighbors_ = round(self.smoothing * X.shape[0])
+        # Monomial exponents of the local polynomial, reused by every query
+        self.exponents_ = np.arange(self.degree + 1)
 
         X, y = self._validate_data(X, y, accept_sparse=True, reset=True)
-        self.norm_X_global_, self.min_X_global, self.max_X_global = normalize_array(X)
-        self.norm_y_global_, self.min_y_global, self.max_y_global = normalize_array(y)
+        X = X.ravel()
+        self.min_X_global = np.min(X)
+        self.max_X_global = np.max(X)
+        # Precompute the inverse of the X range so queries are normalized with
+        # a multiplication instead of a division
+        self.scale_X_ = 1.0 / (self.max_X_global - self.min_X_global)
+        # Normalize the training X with the exact expression estimate applies
+        # to queries: the results must compare bit-for-bit equal for the
+        # training-neighborhood cache to recognize the training X
+        norm_X = (X - self.min_X_global) * self.scale_X_
+        norm_y, self.min_y_global, self.max_y_global = normalize_array(y)
+        # Neighborhoods are contiguous windows on sorted X, so sort the
+        # training data once here; predict then sweeps a sliding window
+        # instead of searching the closest points of every query
+        if self.sort:
+            order = np.argsort(norm_X, kind="stable")
+            norm_X = norm_X[order]
+            norm_y = norm_y[order]
+        # Keep X and y in one contiguous block so every neighborhood gather
+        # touches a single allocation; the per-variable attributes are views
+        # into its rows
+        self.norm_Xy_global_ = np.vstack((norm_X, norm_y))
+        self.norm_X_global_ = self.norm_Xy_global_[0]
+        self.norm_y_global_ = self.norm_Xy_global_[1]
+        # Precompute the y range so predictions are denormalized in one
+        # affine pass
+        self.range_y_ = self.max_y_global - self.min_y_global
+        # Invalidate the cached training-point neighborhoods used by predict
+        self._train_neighborhoods = None
         self.is_fitted_ = True
         return self
 
     def estimate(self, X):
-        if X == np.nan:
-            return np.nan
-        norm_X_local = normalize_value(X, self.min_X_global, self.max_X_global)
-        distances = np.abs(self.norm_X_global_ - norm_X_local)
-        min_range = get_min_range(distances, self.n_neighbors_)
-        weights = get_weights(distances, min_range)
-        if self.degree == 1:
-            y = estimate_linear(
-                min_range,
-                self.norm_X_global_,
-                self.norm_y_global_,
-                weights,
-                norm_X_local,
-            )
+        """Estimate the y values of a batch of X values.
+
+        Parameters
+        ----------
+        X : {array-like}, shape (n,)
+            The values to estimate; scalars are treated as length-1 batches.
+
+        Returns
+        -------
+        y : ndarray, shape (n,)
+            Returns an array containing the estimated values.
+        """
+        X = np.atleast_1d(np.asarray(X, dtype=float)).ravel()
+        norm_X_query = (X - self.min_X_global) * self.scale_X_
+
+        # Sort the queries so the neighborhood window only ever slides right;
+        # the permutation is inverted again before returning
+        order = np.argsort(norm_X_query, kind="stable")
+        sorted_queries = norm_X_query[order]
+
+        # Smoothing the training curve itself is the common case: the window
+        # edges and weights then only depend on the fitted data, so they are
+        # computed once and reused across predict calls
+        is_training_query = np.array_equal(sorted_queries, self.norm_X_global_)
+        if is_training_query and self._train_neighborhoods is not None:
+            left_edges, weights = self._train_neighborhoods
         else:
-            y = estimate_polynomial(
-                self.n_neighbors_,
-                weights,
-                self.degree,
-                self.norm_X_global_,
-                self.norm_y_global_,
-                norm_X_local,
-                min_range,
+            left_edges = slide_windows(
+                self.norm_X_global_, sorted_queries, self.n_neighbors_
             )
+            weights = None
+
+        n_queries = sorted_queries.shape[0]
+        offsets = np.arange(self.n_neighbors_)
+        compute_weights = weights is None
+        if compute_weights:
+            weights = np.empty((n_queries, self.n_neighbors_))
+        norm_y = np.empty(n_queries)
+
+        # Evaluate the queries in tiles small enough for the (block,
+        # n_neighbors) gather and weight temporaries to stay in L1
+        block_size = max(1, L1_CACHE_BYTES // (8 * self.n_neighbors_))
+
+        # Allocate the per-tile scratch arrays once per call and reuse them
+        # across all tiles, so the hot loop allocates nothing; keeping them
+        # local (rather than on the instance) leaves concurrent predict calls
+        # free of shared mutable state
+        scratch_shape = (min(block_size, n_queries), self.n_neighbors_)
+        idx_buffer = np.empty(scratch_shape, dtype=np.int64)
+        xx_buffer = np.empty(scratch_shape)
+        yy_buffer = np.empty(scratch_shape)
+        dist_buffer = np.empty(scratch_shape)
+
+        for start in range(0, n_queries, block_size):
+            stop = min(start + block_size, n_queries)
+            rows = stop - start
+            min_range = np.add(
+                left_edges[start:stop, None], offsets, out=idx_buffer[:rows]
+            )
+            block_queries = sorted_queries[start:stop]
+
+            # Both gathers read from the contiguous (2, n_samples) block and
+            # land in the preallocated tile buffers
+            xx = np.take(self.norm_X_global_, min_range, out=xx_buffer[:rows])
+            yy = np.take(self.norm_y_global_, min_range, out=yy_buffer[:rows])
+
+            if compute_weights:
+                local_distances = np.subtract(
+                    xx, block_queries[:, None], out=dist_buffer[:rows]
+                )
+                np.abs(local_distances, out=local_distances)
+                weights[start:stop] = tricubic(
+                    local_distances
+                    / np.max(local_distances, axis=1, keepdims=True)
+                )
+            block_weights = weights[start:stop]
+
+            if self.degree == 1:
+                norm_y[start:stop] = estimate_linear_batch(
+                    xx, yy, block_weights, block_queries
+                )
+            else:
+                norm_y[start:stop] = estimate_polynomial_batch(
+                    xx, yy, block_weights, block_queries, self.exponents_
+                )
 
-        denormalized_y = denormalize(y, self.min_y_global, self.max_y_global)
-        return denormalized_y
+        if is_training_query and self._train_neighborhoods is None:
+            self._train_neighborhoods = (left_edges, weights)
+
+        # Denormalize and undo the query permutation in one final affine pass
+        predicted = np.empty_like(norm_y)
+        predicted[order] = norm_y * self.range_y_ + self.min_y_global
+        return predicted
 
     def predict(self, X):
         """Estimate the y values from a collection of X values.
@@ -418,6 +507,4 @@ class LOESS(RegressorMixin, BaseEstimator):
         check_is_fitted(self)
         X = to_numpy_array(X)
         X = self._validate_data(X, accept_sparse=True, reset=False)
-        predicted = np.vectorize(self.estimate)(X)
-        predicted = predicted.flatten()
-        return predicted
+        return self.estimate(X.ravel())
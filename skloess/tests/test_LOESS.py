@@ -240,3 +240,49 @@ def test_multiple_cases(data, degree, smoothing, expected):
     expected = np.around(expected, 6)
     y_pred = np.around(y_pred, 6)
     assert_array_equal(y_pred, expected)
+
+
+def test_fit_sorts_unsorted_data(data):
+    """Fitting shuffled data must match fitting the same data in X order."""
+    X, y = data
+    rng = np.random.RandomState(0)
+    permutation = rng.permutation(len(X))
+
+    est_sorted = LOESS().fit(X, y)
+    est_shuffled = LOESS().fit(X[permutation], y[permutation])
+    assert_array_equal(est_sorted.predict(X), est_shuffled.predict(X))
+
+
+def test_sort_false_on_presorted_data(data):
+    """sort=False on already ascending X must match the default sorting fit."""
+    X, y = data
+    est_default = LOESS().fit(X, y)
+    est_presorted = LOESS(sort=False).fit(X, y)
+    assert_array_equal(est_default.predict(X), est_presorted.predict(X))
+
+
+def test_train_neighborhood_cache(data):
+    """Cached training-point neighborhoods must not leak across queries or fits."""
+    X, y = data
+    est = LOESS()
+    est.fit(X, y)
+    assert est._train_neighborhoods is None
+
+    # First call on the training X populates the cache, the second one hits it
+    first = est.predict(X)
+    assert est._train_neighborhoods is not None
+    cached = est._train_neighborhoods
+    off_grid = est.predict(X + 0.05)
+    second = est.predict(X)
+    assert est._train_neighborhoods is cached
+    assert_array_equal(first, second)
+
+    # Off-training queries are unaffected by the cached training windows
+    off_grid_again = est.predict(X + 0.05)
+    assert_array_equal(off_grid, off_grid_again)
+
+    # Refitting invalidates the cache: shifting y must shift the predictions
+    est.fit(X, y + 1.0)
+    assert est._train_neighborhoods is None
+    refit = est.predict(X)
+    assert_array_equal(np.around(refit, 6), np.around(first + 1.0, 6))